@@ -10,6 +10,8 @@ const fs = require('fs-extra');       //File System - for file manipulation
 const logger = require('log4js').getLogger('server');
 logger.level = 'info';
 
+const METRICS_FILE = './output/metrics.json';
+
 app.use(busboy());
 app.use(express.static(path.join(__dirname, 'public')));
 app.use('/static', express.static('static'));
@@ -55,6 +57,31 @@ app.get('/download/:file(*)',(req, res) => {
 	});
 });
 
+// per-stage metrics of the running conversion, dumped by convert-voters.py --metrics-file
+app.get('/metrics', (req, res) => {
+	fs.readFile(METRICS_FILE, function(err, data) {
+		if (err) {
+			res.writeHead(404, {"Content-Type": "text/plain"});
+			res.end("ERROR No metrics yet");
+			return;
+		}
+		res.writeHead(200, {"Content-Type": "application/json"});
+		res.end(data);
+	});
+});
+
+// push every metrics dump to the status feed
+fs.watchFile(METRICS_FILE, {interval: 5000}, function(curr) {
+	if (curr.size === 0) {
+		return;
+	}
+	fs.readFile(METRICS_FILE, function(err, data) {
+		if (!err) {
+			io.emit('METRICS', data.toString());
+		}
+	});
+});
+
 io.on('connection', function(socket){
 	let address=socket.request && socket.request.connection ? socket.request.connection.remoteAddress : "UNKNOWN";
 	logger.info('A new WebSocket connection has been established from %s', address);
@@ -77,7 +104,7 @@ function sendStatus(msg) {
 function processFile(filename) {
 
 	let infile="./uploads/" + filename.toLowerCase();
-	const spawn  = require('child_process').spawn, py = spawn('python3', ['./../convert-voters.py', '--input', infile,'--xls']);
+	const spawn  = require('child_process').spawn, py = spawn('python3', ['./../convert-voters.py', '--input', infile,'--xls', '--metrics-file', METRICS_FILE, '--metrics-interval', '5']);
 
 	py.stdout.on('data', function(data) {
 		sendStatus(data.toString().slice(25).replace('./uploads/','').replace('output/','').replace("INFO",""));
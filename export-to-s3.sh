@@ -1,24 +1,12 @@
-mkdir -p /tmp/s3
-rm -rf /tmp/s3/*
-
-MYSQL="mysql --login-path=local -v -v -v "
-
-for dc in 1 2 3 4 5 6 7 8 9 10 11 12 13 
-do
-  echo "Exporting DC ${dc} FROM DB "
-  $MYSQL -e "select * from voters where dc=${dc} into outfile '/tmp/s3/dc_${dc}.csv' fields terminated by ',' enclosed by '\"' lines terminated by '\n'"
-done
-
-for dc in 1 2 3 4 5 6 7 8 9 10 11 12 13 
-do
-  echo "Archiving the file ${dc}"
-  cd /tmp/s3 && tar -cvz -f dc_${dc}.tar.gz dc_${dc}.csv && rm -rf dc_${dc}.csv
-done
-
-echo "Syncing to s3"
-cd /tmp/s3 && rm -rf *.csv
-cd /tmp/s3 && aws s3 sync . s3://jsp-voters-data/data1/
-
-
-
-
+#!/bin/bash
+# exports the voters table to s3, one dc_N.csv.gz per district streamed from MySQL and
+# uploaded in parallel multipart parts, rerun to resume an interrupted export
+# usage: export-to-s3.sh [district] (all districts by default)
+
+S3=${S3:-s3://jsp-voters-data/data1}
+
+if [ -n "$1" ]; then
+  python3 convert-voters.py --s3 "${S3}" --s3-export --district "$1"
+else
+  python3 convert-voters.py --s3 "${S3}" --s3-export
+fi
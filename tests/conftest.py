@@ -0,0 +1,85 @@
+import importlib.util
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA=os.path.join(ROOT, 'tests', 'data')
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+@pytest.fixture(scope='session')
+def cv():
+    spec=importlib.util.spec_from_file_location('convert_voters', os.path.join(ROOT, 'convert-voters.py'))
+    module=importlib.util.module_from_spec(spec)
+    # the process pools pickle the module's functions by name
+    sys.modules['convert_voters']=module
+    spec.loader.exec_module(module)
+    return module
+
+# parses the command line into the module's global args, like the __main__ block
+@pytest.fixture
+def options(cv, monkeypatch):
+    def options(*argv):
+        monkeypatch.setattr(sys, 'argv', ['convert-voters.py'] + list(argv))
+        parser, args=cv.init_options()
+        monkeypatch.setattr(cv, 'args', args, raising=False)
+        return args
+    return options
+
+#
+# sqlite behind the few mysql.connector calls the bulk loader makes, LOAD DATA fails
+# with the given errno (local infile disabled by default)
+#
+class SQLiteCursor:
+    def __init__(self, db, infile_error):
+        self.cursor=db.cursor()
+        self.infile_error=infile_error
+
+    def execute(self, query, params=()):
+        if query.startswith("SHOW TABLES LIKE"):
+            query="SELECT name FROM sqlite_master WHERE type='table' AND name=" + query.split("LIKE")[1]
+        if query.startswith("LOAD DATA"):
+            raise self.infile_error
+        self.cursor.execute(query.replace("INSERT IGNORE", "INSERT OR IGNORE").replace("%s", "?"), params)
+
+    def executemany(self, query, rows):
+        self.cursor.executemany(query.replace("INSERT IGNORE", "INSERT OR IGNORE").replace("%s", "?"), rows)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self.cursor.fetchmany(size)
+
+    def close(self):
+        pass
+
+class SQLiteConnection:
+    def __init__(self, db, infile_error):
+        self.db=db
+        self.infile_error=infile_error
+
+    def cursor(self):
+        return SQLiteCursor(self.db, self.infile_error)
+
+    def commit(self):
+        self.db.commit()
+
+    def ping(self, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def mysql_db(cv, monkeypatch):
+    def mysql_db(infile_errno=None):
+        db=sqlite3.connect(':memory:', check_same_thread=False)
+        db.execute("CREATE TABLE voters (" + ",".join(cv.VotersBulkLoader.COLUMNS) + ")")
+        error=cv.mysql.connector.Error(msg="LOAD DATA failed", errno=infile_errno or 3948)
+        monkeypatch.setattr(cv.mysql.connector, 'connect', lambda **kwargs: SQLiteConnection(db, error))
+        return db
+    return mysql_db
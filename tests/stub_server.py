@@ -0,0 +1,69 @@
+#
+# a small aiohttp stand-in for the electoral rolls site, serves the booth popup form,
+# a captcha and a PDF per booth so the downloaders can be tested through --base-url.
+# Booth 3 has no data, every other booth needs the captcha text STUB_CAPTCHA
+#
+import asyncio
+import threading
+
+from aiohttp import web
+
+STUB_CAPTCHA='ABC123'
+NODATA_BOOTH=3
+
+FORM=b'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="VS1" /><input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="EV1" />'
+
+def booth_pdf(booth):
+    return b'%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n% booth ' + str(booth).encode() + b'\n' + bytes(100000) + b'\n%%EOF\n'
+
+class StubServer:
+    def __init__(self):
+        self.stats={'popup': 0, 'captcha': 0, 'pdf': 0, 'rejected': 0}
+        self.loop=asyncio.new_event_loop()
+        self.runner=None
+        self.port=None
+        self.thread=threading.Thread(target=self.loop.run_forever, name="stub-server", daemon=True)
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:%d/Electoral_Rolls" % self.port
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.__start(), self.loop).result(timeout=10)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=10)
+
+    async def __start(self):
+        app=web.Application()
+        app.router.add_post('/Electoral_Rolls/Popuppage.aspx', self.popup)
+        app.router.add_get('/Electoral_Rolls/Captcha.aspx', self.captcha)
+        self.runner=web.AppRunner(app)
+        await self.runner.setup()
+        site=web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.port=self.runner.addresses[0][1]
+
+    async def popup(self, request):
+        data=await request.post()
+        booth=int(request.query['partNumber'])
+        if 'txtVerificationCode' not in data:
+            self.stats['popup']+=1
+            return web.Response(body=b'<html>' + FORM + b'Enter Verifaction Code</html>', content_type='text/html')
+        if data['__VIEWSTATE'] != 'VS1':
+            return web.Response(body=b'<html>error occured on our website</html>', content_type='text/html')
+        if booth == NODATA_BOOTH:
+            return web.Response(body=b'<html>Data will be uploaded shorlty</html>', content_type='text/html')
+        if data['txtVerificationCode'] != STUB_CAPTCHA:
+            self.stats['rejected']+=1
+            return web.Response(body=b'<html>' + FORM + b'Please enter correct captcha</html>', content_type='text/html')
+        self.stats['pdf']+=1
+        return web.Response(body=booth_pdf(booth), content_type='application/pdf')
+
+    async def captcha(self, request):
+        self.stats['captcha']+=1
+        return web.Response(body=b'IMG', content_type='image/png')
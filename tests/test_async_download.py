@@ -0,0 +1,85 @@
+#
+# downloads a few booths with the asyncio engine (--async-download) from the stub
+# server through --base-url, the captcha OCR is replaced by a fixed answer
+#
+import itertools
+import os
+
+import pytest
+
+from stub_server import NODATA_BOOTH, STUB_CAPTCHA, StubServer, booth_pdf
+
+@pytest.fixture
+def server():
+    server=StubServer().start()
+    yield server
+    server.stop()
+
+def download_args(cv, options, server, output, monkeypatch):
+    args=options('--async-download', '--skip-proxy', '--base-url', server.base_url, '--output', str(output), '--threads', '4', '--rate', '100', '--max-rate', '100')
+    monkeypatch.setattr(cv, 'RATE_LIMITER', cv.RateLimiter(rate=args.rate, max_rate=args.max_rate))
+    return args
+
+def test_async_download_booths(cv, options, server, tmp_path, monkeypatch):
+    answers=itertools.count()
+    # every third captcha is misread, the downloader has to retry it
+    monkeypatch.setattr(cv, 'solve_captcha_image', lambda data: 'WRONG1' if next(answers) % 3 == 0 else STUB_CAPTCHA)
+    args=download_args(cv, options, server, tmp_path, monkeypatch)
+    cv.async_download_booths(args, 1, 2, [1, 2, 3, 4])
+
+    for booth in (1, 2, 4):
+        with open(os.path.join(str(tmp_path), "1_2", "1_2_%d.pdf" % booth), "rb") as f:
+            assert f.read() == booth_pdf(booth)
+    assert not os.path.exists(os.path.join(str(tmp_path), "1_2", "1_2_%d.pdf" % NODATA_BOOTH))
+    assert not [f for f in os.listdir(os.path.join(str(tmp_path), "1_2")) if f.endswith(".part")]
+    assert server.stats['pdf'] == 3
+    assert server.stats['rejected'] > 0
+
+    journal=cv.get_booth_journal(str(tmp_path), 1, 2)
+    assert [journal.state(booth) for booth in (1, 2, 4)] == [cv.BOOTH_DOWNLOADED] * 3
+    assert journal.state(NODATA_BOOTH) == cv.BOOTH_NODATA
+
+def test_async_download_resumes_from_journal(cv, options, server, tmp_path, monkeypatch):
+    monkeypatch.setattr(cv, 'solve_captcha_image', lambda data: STUB_CAPTCHA)
+    args=download_args(cv, options, server, tmp_path, monkeypatch)
+    cv.async_download_booths(args, 1, 2, [1, 2])
+    assert server.stats['pdf'] == 2
+
+    # booths already downloaded in the journal are skipped without --overwrite
+    cv.async_download_booths(args, 1, 2, [1, 2, 4])
+    assert server.stats['pdf'] == 3
+
+def test_async_download_adopts_valid_pdfs_missing_from_the_journal(cv, options, server, tmp_path, monkeypatch):
+    monkeypatch.setattr(cv, 'solve_captcha_image', lambda data: STUB_CAPTCHA)
+    args=download_args(cv, options, server, tmp_path, monkeypatch)
+    folder=os.path.join(str(tmp_path), "1_2")
+    os.makedirs(folder)
+    with open(os.path.join(folder, "1_2_1.pdf"), "wb") as f:
+        f.write(booth_pdf(1))
+    # an error page saved by an older run is downloaded again
+    with open(os.path.join(folder, "1_2_2.pdf"), "wb") as f:
+        f.write(b'<html>error occured on our website</html>')
+    cv.async_download_booths(args, 1, 2, [1, 2])
+    assert server.stats['pdf'] == 1
+
+    journal=cv.get_booth_journal(str(tmp_path), 1, 2)
+    assert journal.get(1)['verified']
+    assert [journal.state(booth) for booth in (1, 2)] == [cv.BOOTH_DOWNLOADED] * 2
+    with open(os.path.join(folder, "1_2_2.pdf"), "rb") as f:
+        assert f.read() == booth_pdf(2)
+
+def test_async_download_fails_only_the_broken_booth(cv, options, server, tmp_path, monkeypatch):
+    monkeypatch.setattr(cv, 'solve_captcha_image', lambda data: STUB_CAPTCHA)
+    verify_pdf=cv.verify_pdf
+    def broken_verify_pdf(input_file, expected_length=None):
+        if input_file.endswith("1_2_2.pdf.part"):
+            raise RuntimeError("disk error")
+        return verify_pdf(input_file, expected_length)
+    monkeypatch.setattr(cv, 'verify_pdf', broken_verify_pdf)
+    args=download_args(cv, options, server, tmp_path, monkeypatch)
+    cv.async_download_booths(args, 1, 2, [1, 2, 4])
+
+    journal=cv.get_booth_journal(str(tmp_path), 1, 2)
+    assert [journal.state(booth) for booth in (1, 2, 4)] == [cv.BOOTH_DOWNLOADED, cv.BOOTH_FAILED, cv.BOOTH_DOWNLOADED]
+    assert journal.get(2)['reason'] == "disk error"
+    assert sorted(os.listdir(os.path.join(str(tmp_path), "1_2"))) == ["1_2_1.pdf", "1_2_4.pdf", "1_2_journal.jsonl"]
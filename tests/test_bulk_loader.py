@@ -0,0 +1,24 @@
+#
+# the MySQL bulk loader against the sqlite stand-in of conftest.py, LOAD DATA LOCAL INFILE
+# fails with the errno given to mysql_db
+#
+BOOTH_ROWS=[(sno, 'APO%07d' % sno, 'NAME', 'FS NAME', '1-1', 30, 'Male', 'AREA', '1', '2', '1') for sno in range(1, 6)]
+
+def test_bulk_loader_falls_back_when_infile_is_disabled(cv, mysql_db):
+    db=mysql_db(3948)
+    loader=cv.VotersBulkLoader({}, batch_size=2, commit_interval=10)
+    loader.add(BOOTH_ROWS)
+    loader.close()
+    assert not loader.use_infile
+    assert (loader.total, loader.failed) == (5, 0)
+    assert db.execute("SELECT COUNT(*) FROM voters").fetchone()[0] == 5
+    assert db.execute("SELECT dc, ac, booth FROM voters_booths").fetchall() == [(1, 2, 1)]
+
+def test_bulk_loader_counts_failed_rows(cv, mysql_db):
+    db=mysql_db(1205)
+    loader=cv.VotersBulkLoader({}, batch_size=2, commit_interval=10)
+    loader.add(BOOTH_ROWS)
+    loader.close()
+    assert loader.use_infile
+    assert (loader.total, loader.failed) == (0, 5)
+    assert db.execute("SELECT COUNT(*) FROM voters").fetchone()[0] == 0
@@ -0,0 +1,98 @@
+#
+# --list-missing, the booth bitmaps and the reconciliation against the old shell script
+# (tests/data/find_missing_booths.sh, run with a mysql stand-in that queries sqlite)
+#
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from conftest import DATA, SQLiteConnection
+
+def test_booth_bitmap(cv):
+    bitmap=cv.BoothBitmap()
+    for booth in (1, 5, 300, 5):
+        bitmap.add(1, 2, booth)
+    bitmap.add('1', '3', '7')
+    assert cv.bitmap_booths(bitmap.get((1, 2))) == [1, 5, 300]
+    assert bitmap.get((1, 2)) & (1 << 5)
+    assert not bitmap.get((1, 2)) & (1 << 4)
+    assert bitmap.get((2, 2)) == 0
+    assert bitmap.count((1, 2)) == 3
+    assert bitmap.count() == 4
+
+    other=cv.BoothBitmap()
+    other.add(1, 2, 4)
+    other.add(9, 9, 1)
+    bitmap.update(other)
+    assert cv.bitmap_booths(bitmap.get((1, 2))) == [1, 4, 5, 300]
+    assert sorted(bitmap.keys()) == [(1, 2), (1, 3), (9, 9)]
+
+# booths per AC in the booths table, loaded in voters, and the PDF/TEXT files present
+BOOTHS={2: 10, 3: 6, 4: 3}
+LOADED={2: [1, 2, 5, 9], 3: [1, 2, 3], 4: [1]}
+PDFS={2: [1, 3, 4, 6], 3: [4], 4: [2, 3]}
+TEXTS={2: [3, 6, 9], 3: [5], 4: [3]}
+
+FAKE_MYSQL='''#!%s
+import sqlite3, sys
+rows=sqlite3.connect(%r).execute(sys.argv[sys.argv.index('-e') + 1]).fetchall()
+for row in rows:
+    print("\\t".join("NULL" if value is None else str(value) for value in row))
+'''
+
+@pytest.fixture
+def sample_tree(cv, tmp_path):
+    path=os.path.join(str(tmp_path), 'voters.db')
+    db=sqlite3.connect(path, check_same_thread=False)
+    db.execute("CREATE TABLE booths (SNO, NAME, LOCATION, DC, AC)")
+    db.execute("CREATE TABLE voters (" + ",".join(cv.VotersBulkLoader.COLUMNS) + ")")
+    for ac, count in BOOTHS.items():
+        db.executemany("INSERT INTO booths VALUES (?, 'BOOTH', 'LOCATION', 1, ?)", [(sno, ac) for sno in range(1, count + 1)])
+        db.executemany("INSERT INTO voters (SNO, DC, AC, BOOTH) VALUES (1, 1, ?, ?)", [(ac, booth) for booth in LOADED[ac]])
+    db.commit()
+
+    # the layout the script expects, dc_N/N_AC/*.pdf and dc_N/txt/*.txt
+    output=os.path.join(str(tmp_path), 'output')
+    for ac in BOOTHS:
+        os.makedirs(os.path.join(output, 'dc_1', '1_%d' % ac))
+        for booth in PDFS[ac]:
+            open(os.path.join(output, 'dc_1', '1_%d' % ac, '1_%d_%d.pdf' % (ac, booth)), 'w').close()
+    os.makedirs(os.path.join(output, 'dc_1', 'txt'))
+    for ac in BOOTHS:
+        for booth in TEXTS[ac]:
+            open(os.path.join(output, 'dc_1', 'txt', '1_%d_%d.txt' % (ac, booth)), 'w').close()
+
+    bin_dir=os.path.join(str(tmp_path), 'bin')
+    os.makedirs(bin_dir)
+    with open(os.path.join(bin_dir, 'mysql'), 'w') as f:
+        f.write(FAKE_MYSQL % (sys.executable, path))
+    os.chmod(os.path.join(bin_dir, 'mysql'), 0o755)
+    return db, output, bin_dir
+
+def script_gaps(output, bin_dir, ac):
+    env=dict(os.environ, PATH=bin_dir + os.pathsep + os.environ['PATH'])
+    result=subprocess.run(['bash', os.path.join(DATA, 'find_missing_booths.sh'), '1', str(ac)], cwd=output, env=env, stdout=subprocess.PIPE, check=True)
+    gaps={'missing': [], 'image file exists': [], 'text file exists': []}
+    for line in result.stdout.decode().splitlines():
+        if line.startswith('Booth ') and not line.startswith('Booth NULL'):
+            booth, state=line[len('Booth '):].split(' ', 1)
+            gaps[state].append(int(booth))
+    return [sorted(gaps[state]) for state in ('missing', 'image file exists', 'text file exists')]
+
+def test_find_missing_matches_the_old_script(cv, options, sample_tree, monkeypatch, tmp_path):
+    db, output, bin_dir=sample_tree
+    monkeypatch.setattr(cv, 'MYSQLDB', SQLiteConnection(db, None))
+    args=options('--list-missing', '--output', output, '--district', '1')
+
+    expected, loaded=cv.load_db_bitmaps(args)
+    pdf, txt=cv.scan_booth_files(output)
+    for ac in BOOTHS:
+        all_booths, gaps=cv.booth_gaps((1, ac), expected, pdf, txt, loaded)
+        assert cv.bitmap_booths(all_booths) == list(range(1, BOOTHS[ac] + 1))
+        assert [cv.bitmap_booths(bits) for bits in gaps] == script_gaps(output, bin_dir, ac)
+
+    worklist=cv.find_missing(args)
+    assert worklist == [(1, ac, script_gaps(output, bin_dir, ac)[0]) for ac in BOOTHS if script_gaps(output, bin_dir, ac)[0]]
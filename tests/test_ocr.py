@@ -0,0 +1,67 @@
+#
+# PDF to TEXT conversion, the OCR text cache keyed on the PDF content. gs and tesseract
+# are replaced by stubs returning the page number, slower for the first pages so the
+# parallel pages finish out of order
+#
+import os
+import threading
+import time
+
+import pytest
+
+PAGES=8
+
+@pytest.fixture
+def stub_ocr(cv, monkeypatch):
+    calls={'threads': set(), 'single_thread': set()}
+    def tesseract_image(args, image, single_thread=False):
+        calls['threads'].add(threading.get_ident())
+        calls['single_thread'].add(single_thread)
+        page=int(image.split()[-1])
+        time.sleep(0.01 * (PAGES - page))
+        return ("Page %d\nElector's Name: VOTER %d\n" % (page, page)).encode()
+    monkeypatch.setattr(cv, 'get_pdf_page_count', lambda input_file: PAGES)
+    monkeypatch.setattr(cv, 'render_pdf_page', lambda input_file, page: b'IMAGE %d' % page)
+    monkeypatch.setattr(cv, 'tesseract_image', tesseract_image)
+    return calls
+
+def convert(cv, options, tmp_path, *argv):
+    pdf_file=os.path.join(str(tmp_path), '1_2_1.pdf')
+    with open(pdf_file, 'wb') as f:
+        f.write(b'%PDF-1.4\n%%EOF\n')
+    args=options('--input', pdf_file, '--output', str(tmp_path), '--overwrite', *argv)
+    text_file=cv.ocr_image_file(args, pdf_file)
+    with open(text_file, 'rb') as f:
+        return f.read()
+
+def test_pdf_pages_are_converted_in_parallel_by_default(cv, options, stub_ocr, monkeypatch, tmp_path):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    parallel=convert(cv, options, tmp_path)
+    assert len(stub_ocr['threads']) > 1
+    assert stub_ocr['single_thread'] == {True}
+
+    stub_ocr['threads'].clear()
+    stub_ocr['single_thread'].clear()
+    sequential=convert(cv, options, tmp_path, '--ocr-workers', '1')
+    assert len(stub_ocr['threads']) == 1
+    assert stub_ocr['single_thread'] == {False}
+    # pages are written back in page order
+    assert parallel == sequential == b''.join(b"Page %d\nElector's Name: VOTER %d\n" % (page, page) for page in range(1, PAGES + 1))
+
+def test_ocr_workers_are_shared_by_the_booths(cv, options, monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    args=options()
+    assert cv.ocr_page_workers(args, 20) == 8
+    assert cv.ocr_page_workers(args, 3) == 3
+    monkeypatch.setattr(cv, 'OCR_BOOTHS', 4)
+    assert cv.ocr_page_workers(args, 20) == 2
+    assert cv.ocr_page_workers(options('--ocr-workers', '3'), 20) == 3
+
+def test_ocr_cache_size(cv, tmp_path):
+    cache=cv.OCRCache(str(tmp_path), max_bytes=1024*1024)
+    cache.set('ab' * 16, b'x' * 100)
+    cache.set('ab' * 16, b'x' * 40)
+    cache.set('cd' * 16, b'y' * 10)
+    assert cache.size == 50
+    assert cache.get('ab' * 16) == b'x' * 40
+    assert cv.OCRCache(str(tmp_path)).size == 50
@@ -0,0 +1,211 @@
+#
+# output of ProcessTextFile.write, booths are streamed to the sinks as they are parsed
+# and published all or nothing
+#
+import csv
+import gzip
+import os
+import shutil
+
+import pytest
+
+from conftest import DATA
+
+BOOTH_FILE=os.path.join(DATA, '1_2_1.txt')
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+def test_csv_output(cv, options, tmp_path):
+    args=options('--csv', '--output', str(tmp_path))
+    assert cv.ProcessTextFile(args, BOOTH_FILE).process()
+    rows=read_csv(os.path.join(str(tmp_path), '1_2_1.csv'))
+    assert rows[0] == cv.OUTPUT_COLUMNS
+    assert len(rows) == 13
+    assert rows[1][-3:] == ['1', '2', '1']
+
+def test_csv_output_of_other_file_names(cv, options, tmp_path):
+    input_file=os.path.join(str(tmp_path), 'sample.txt')
+    shutil.copy(BOOTH_FILE, input_file)
+    args=options('--csv', '--output', str(tmp_path))
+    assert cv.ProcessTextFile(args, input_file).process()
+    rows=read_csv(os.path.join(str(tmp_path), 'sample.csv'))
+    assert len(rows) == 13
+    assert rows[1][-3:] == ['', '', '']
+
+def test_no_output_on_parse_error(cv, options, tmp_path):
+    args=options('--csv', '--stop-on-error', '--output', str(tmp_path))
+    assert not cv.ProcessTextFile(args, broken_booth(tmp_path)).process()
+    assert [f for f in os.listdir(str(tmp_path)) if '.csv' in f] == []
+
+def broken_booth(tmp_path, name='1_2_9.txt'):
+    # the first block loses its House No line, parsing stops at the next block
+    input_file=os.path.join(str(tmp_path), name)
+    with open(BOOTH_FILE) as f:
+        lines=f.readlines()
+    with open(input_file, 'w') as f:
+        f.writelines(line for line in lines if not line.startswith('House No: 8-53'))
+    return input_file
+
+def test_rows_are_written_while_parsing(cv, options, monkeypatch, tmp_path):
+    args=options('--csv', '--output', str(tmp_path))
+    parser=cv.ProcessTextFile(args, BOOTH_FILE)
+    parsed=[]
+    written=[]
+    def voters():
+        for voter in parser.iter_voters():
+            parsed.append(voter)
+            yield voter
+    sink_write=cv.CSVSink.write
+    def write(sink, rows):
+        written.append((len(rows), len(parsed)))
+        sink_write(sink, rows)
+    monkeypatch.setattr(cv.CSVSink, 'write', write)
+    assert parser.write(voters(), parser.metadata, batch_size=5) == 12
+    # each batch reaches the sink as soon as it is parsed
+    assert written == [(5, 5), (5, 10), (2, 12)]
+    assert not os.path.exists(os.path.join(str(tmp_path), '1_2_1.csv.part'))
+    assert len(read_csv(os.path.join(str(tmp_path), '1_2_1.csv'))) == 13
+
+def test_xls_output(cv, options, tmp_path):
+    openpyxl=pytest.importorskip('openpyxl')
+    args=options('--xls', '--output', str(tmp_path))
+    assert cv.ProcessTextFile(args, BOOTH_FILE).process()
+    workbook=openpyxl.load_workbook(os.path.join(str(tmp_path), '1_2_1.xlsx'), read_only=True)
+    voters=list(workbook['VOTERS DATA'].iter_rows(values_only=True))
+    assert list(voters[0]) == cv.OUTPUT_COLUMNS
+    assert len(voters) == 13
+    assert voters[1][:3] == (1, 'APO1058756', 'PADMA')
+    details={row[0]: row[1] for row in workbook['DETAILS'].iter_rows(min_row=2, values_only=True)}
+    assert details['TOTAL'] == 12
+    assert details['MALE'] + details['FEMALE'] == 12
+
+def test_xls_rows_are_written_while_parsing(cv, options, monkeypatch, tmp_path):
+    openpyxl=pytest.importorskip('openpyxl')
+    args=options('--xls', '--output', str(tmp_path))
+    parser=cv.ProcessTextFile(args, BOOTH_FILE)
+    parsed=[]
+    written=[]
+    def voters():
+        for voter in parser.iter_voters():
+            parsed.append(voter)
+            yield voter
+    sink_write=cv.XLSSink.write
+    def write(sink, rows):
+        sink_write(sink, rows)
+        # constant_memory keeps the last row only, the earlier ones are already in the worksheet file
+        written.append((sink.total, len(parsed), len(sink.voters.table), sink.voters.row_data_fh.tell()))
+    monkeypatch.setattr(cv.XLSSink, 'write', write)
+    assert parser.write(voters(), parser.metadata, batch_size=5) == 12
+    # rows reach the workbook batch by batch while the booth is still being parsed
+    assert [row[:3] for row in written] == [(5, 5, 1), (10, 10, 1), (12, 12, 1)]
+    assert 0 < written[0][3] < written[1][3] < written[2][3]
+    workbook=openpyxl.load_workbook(os.path.join(str(tmp_path), '1_2_1.xlsx'), read_only=True)
+    assert len(list(workbook['VOTERS DATA'].iter_rows(values_only=True))) == 13
+
+def test_db_booth_is_all_or_nothing(cv, options, mysql_db, monkeypatch, tmp_path):
+    db=mysql_db()
+    args=options('--db', '--stop-on-error')
+    loader=cv.VotersBulkLoader({}, batch_size=5, commit_interval=1)
+    monkeypatch.setattr(cv, 'VOTERS_LOADER', loader)
+    assert cv.ProcessTextFile(args, BOOTH_FILE).process()
+
+    # a booth failing after 8 voters, 5 of them are already flushed to the table
+    parser=cv.ProcessTextFile(args, os.path.join(DATA, '1_2_2.txt'))
+    def voters():
+        for count, voter in enumerate(cv.ProcessTextFile(args, BOOTH_FILE).iter_voters(), 1):
+            if count > 8:
+                parser.error=True
+                return
+            if count == 8:
+                assert db.execute("SELECT COUNT(*) FROM voters WHERE BOOTH='2'").fetchone()[0] == 5
+            yield voter
+    assert parser.write(voters(), {}, batch_size=4) == 0
+    assert not cv.ProcessTextFile(args, broken_booth(tmp_path)).process()
+    loader.close()
+
+    assert (loader.total, loader.failed) == (12, 0)
+    assert db.execute("SELECT COUNT(*), MIN(BOOTH), MAX(BOOTH) FROM voters").fetchone() == (12, '1', '1')
+    assert db.execute("SELECT dc, ac, booth FROM voters_booths").fetchall() == [(1, 2, 1)]
+
+def booth_copy(tmp_path, name):
+    input_file=os.path.join(str(tmp_path), name)
+    shutil.copy(BOOTH_FILE, input_file)
+    return input_file
+
+def test_merged_csv_output(cv, options, monkeypatch, tmp_path):
+    args=options('--csv', '--csv-merge', 'ac', '--stop-on-error', '--output', str(tmp_path))
+    writer=cv.MergedCSVWriter()
+    monkeypatch.setattr(cv, 'CSV_WRITER', writer)
+    for name in ('1_2_1.txt', '1_2_2.txt', '1_3_1.txt'):
+        assert cv.ProcessTextFile(args, booth_copy(tmp_path, name)).process()
+
+    # a booth failing after two batches were staged, and one failing right away
+    parser=cv.ProcessTextFile(args, os.path.join(str(tmp_path), '1_2_5.txt'))
+    def voters():
+        for count, voter in enumerate(cv.ProcessTextFile(args, BOOTH_FILE).iter_voters(), 1):
+            if count > 8:
+                parser.error=True
+                return
+            yield voter
+    assert parser.write(voters(), {}, batch_size=4) == 0
+    assert not cv.ProcessTextFile(args, broken_booth(tmp_path)).process()
+    writer.close()
+
+    rows=read_csv(os.path.join(str(tmp_path), '1_2.csv'))
+    assert rows[0] == cv.OUTPUT_COLUMNS
+    assert rows.count(cv.OUTPUT_COLUMNS) == 1
+    assert len(rows) == 1 + 24
+    booths=[row[-1] for row in rows[1:]]
+    assert booths.count('1') == 12 and booths.count('2') == 12
+    assert sorted(row[0] for row in rows[1:] if row[-1] == '1') == sorted(str(sno) for sno in range(1, 13))
+    assert len(read_csv(os.path.join(str(tmp_path), '1_3.csv'))) == 13
+    assert (writer.rows, writer.failed) == (36, 0)
+
+def test_merged_csv_output_per_run(cv, options, monkeypatch, tmp_path):
+    args=options('--csv', '--csv-merge', 'run', '--gzip', '--output', str(tmp_path))
+    writer=cv.MergedCSVWriter()
+    monkeypatch.setattr(cv, 'CSV_WRITER', writer)
+    for name in ('1_2_1.txt', '1_2_2.txt', '2_7_1.txt'):
+        assert cv.ProcessTextFile(args, booth_copy(tmp_path, name)).process()
+    writer.close()
+
+    with gzip.open(os.path.join(str(tmp_path), 'voters.csv.gz'), 'rt', newline='', encoding='utf-8') as f:
+        rows=list(csv.reader(f))
+    assert rows.count(cv.OUTPUT_COLUMNS) == 1
+    assert sorted(set(tuple(row[-3:]) for row in rows[1:])) == [('1', '2', '1'), ('1', '2', '2'), ('2', '7', '1')]
+    assert len(rows) == 1 + 36
+
+def test_parquet_output_matches_csv(cv, options, tmp_path):
+    pa=pytest.importorskip('pyarrow')
+    pq=pytest.importorskip('pyarrow.parquet')
+    args=options('--parquet', '--csv', '--stop-on-error', '--output', str(tmp_path))
+    for name in ('1_2_1.txt', '1_2_2.txt', '1_3_4.txt'):
+        assert cv.ProcessTextFile(args, booth_copy(tmp_path, name)).process()
+    assert not cv.ProcessTextFile(args, broken_booth(tmp_path)).process()
+
+    voters=pq.read_table(os.path.join(str(tmp_path), cv.PARQUET_VOTERS))
+    schema=cv.parquet_voters_schema()
+    for field in schema:
+        assert voters.schema.field(field.name).type == field.type
+    assert pa.types.is_integer(voters.schema.field('AGE').type)
+    assert voters.num_rows == 36
+
+    for name in ('1_2_1', '1_2_2', '1_3_4'):
+        dc, ac, booth=name.split('_')
+        csv_rows=read_csv(os.path.join(str(tmp_path), name + '.csv'))[1:]
+        table=pq.read_table(os.path.join(cv.parquet_partition(str(tmp_path), cv.PARQUET_VOTERS, dc, ac), name + '.parquet'))
+        assert table.num_rows == len(csv_rows)
+        assert table.column('BOOTH').to_pylist() == [int(booth)] * len(csv_rows)
+        assert table.column('AGE').to_pylist() == [int(row[cv.OUTPUT_COLUMNS.index('AGE')]) for row in csv_rows]
+        assert [list(row) for row in zip(*(table.column(column).to_pylist() for column in ('ID', 'NAME', 'SEX', 'AREA')))] == \
+               [[row[cv.OUTPUT_COLUMNS.index(column)] for column in ('ID', 'NAME', 'SEX', 'AREA')] for row in csv_rows]
+
+    booths=pq.read_table(os.path.join(str(tmp_path), cv.PARQUET_BOOTHS)).to_pylist()
+    assert sorted((row['AC'], row['BOOTH'], row['TOTAL'], row['MALE'] + row['FEMALE']) for row in booths) == [(2, 1, 12, 12), (2, 2, 12, 12), (3, 4, 12, 12)]
+    assert [f for root, dirs, files in os.walk(str(tmp_path)) for f in files if f.startswith('1_2_9')] == ['1_2_9.txt']
+
+    cv.compact_parquet(args)
+    assert pq.read_table(os.path.join(str(tmp_path), cv.PARQUET_VOTERS)).num_rows == 36
+    assert os.listdir(cv.parquet_partition(str(tmp_path), cv.PARQUET_VOTERS, 1, 2)) == ['part-0.parquet']
@@ -0,0 +1,29 @@
+#
+# TEXT parsing and line classification on a small booth (tests/data/1_2_1.txt, 12 voters)
+#
+import os
+
+from conftest import DATA
+
+BOOTH_FILE=os.path.join(DATA, '1_2_1.txt')
+
+def test_parse_text_file(cv, options):
+    args=options()
+    voters, metadata=cv.ProcessTextFile(args, BOOTH_FILE).parse()
+    assert len(voters) == 12
+    assert voters[0].row() == (1, 'APO1058756', 'PADMA', 'NAGA RAJU', '8-53', 87, 'Male', 'Ward 1 Street Area')
+    assert voters[-1].row() == (12, 'APO4517759', 'RAMA RAO', 'KRISHNA MURTHY', '17-212', 18, 'Female', 'Ward 1 Street Area')
+    assert all(voter.filled() == len(cv.VOTER_COLUMNS) for voter in voters)
+    assert metadata['PINCODE'] == '532312'
+    assert metadata['MANDAL'] == 'ICHCHAPURAM'
+
+def test_classify_lines(cv):
+    assert cv.classify_line("Elector's Name: PADMA") == 'NAME'
+    assert cv.classify_line("Husband's Name: PADMA") == 'FS_NAME'
+    assert cv.classify_line("House No: 8-53") == 'HNO'
+    assert cv.classify_line("Age: 87 Sex: Male") == 'AGE_SEX'
+    assert cv.classify_line("Contd... Ward 1 Street Area") == 'CONTD'
+    assert cv.classify_line("Age: 87") is None
+    assert cv.classify_line("Photo is Available") is None
+    assert cv.classify_line("Pin Code : 532312") is None
+    assert cv.classify_line("Pin Code : 532312", cv.FIRST_PAGE_LINE_TAGS) == 'METADATA_PINCODE'
@@ -0,0 +1,59 @@
+#
+# resumes a --pipeline download that stopped between OCR and writing, the PDF to TEXT
+# conversion is replaced by a copy of tests/data/1_2_1.txt
+#
+import os
+import shutil
+
+import pytest
+
+from conftest import DATA
+from stub_server import STUB_CAPTCHA, StubServer
+
+@pytest.fixture
+def server():
+    server=StubServer().start()
+    yield server
+    server.stop()
+
+def run_pipeline(cv, args, booths, monkeypatch):
+    pipeline=cv.Pipeline(args)
+    monkeypatch.setattr(cv, 'PIPELINE', pipeline)
+    try:
+        cv.async_download_booths(args, 1, 2, booths)
+    finally:
+        pipeline.close()
+    return pipeline
+
+def test_pipeline_resumes_a_partial_run(cv, options, server, tmp_path, monkeypatch):
+    args=options('--async-download', '--pipeline', '--pipeline-ocr', '2', '--skip-proxy', '--base-url', server.base_url,
+                 '--output', str(tmp_path), '--csv', '--rate', '100', '--max-rate', '100')
+    monkeypatch.setattr(cv, 'RATE_LIMITER', cv.RateLimiter(rate=args.rate, max_rate=args.max_rate))
+    monkeypatch.setattr(cv, 'solve_captcha_image', lambda data: STUB_CAPTCHA)
+    converted=[]
+    def ocr_image_file(args, input_file):
+        text_file=cv.ocr_text_file(args, input_file)
+        shutil.copy(os.path.join(DATA, '1_2_1.txt'), text_file)
+        converted.append(os.path.basename(input_file))
+        # the first run is killed after booth 2 is converted, before it is written
+        if input_file.endswith('1_2_2.pdf') and len(converted) <= 2:
+            raise RuntimeError("killed")
+        return text_file
+    monkeypatch.setattr(cv, 'ocr_image_file', ocr_image_file)
+
+    first=run_pipeline(cv, args, [1, 2], monkeypatch)
+    assert (first.written, first.failed, first.skipped) == (1, 1, 0)
+    assert os.path.isfile(os.path.join(str(tmp_path), '1_2_2.txt'))
+    assert not os.path.exists(os.path.join(str(tmp_path), '1_2_2.csv'))
+
+    converted.clear()
+    second=run_pipeline(cv, args, [1, 2, 4], monkeypatch)
+    assert server.stats['pdf'] == 3
+    # booth 1 was written before, booth 2 is parsed from its TEXT file, only booth 4 is converted
+    assert converted == ['1_2_4.pdf']
+    assert (second.written, second.failed, second.skipped) == (2, 0, 1)
+    for booth in (1, 2, 4):
+        with open(os.path.join(str(tmp_path), '1_2_%d.csv' % booth)) as f:
+            assert len(f.readlines()) == 13
+    journal=cv.get_booth_journal(str(tmp_path), 1, 2)
+    assert [journal.is_loaded(booth) for booth in (1, 2, 4)] == [True] * 3
@@ -0,0 +1,133 @@
+#
+# the proxy health pool, proxies are never fetched or validated over the network, the
+# store refill and the harvester run against a fake proxy list and health check
+#
+import os
+import random
+import sqlite3
+import time
+
+import pytest
+
+FAST='http://10.0.0.1:8080'
+SLOW='http://10.0.0.2:8080'
+DOWN='http://10.0.0.3:8080'
+
+@pytest.fixture
+def pool(cv):
+    # min_proxies 0 and no store, the pool never refills itself
+    pool=cv.ProxyPool(cooldown=60, min_proxies=0)
+    pool.add([FAST], latency=0.1)
+    pool.add(['10.0.0.2:8080'], latency=1.0)
+    pool.add([{'http': DOWN}], latency=0.1)
+    return pool
+
+def test_proxies_are_normalized_once(pool):
+    assert len(pool) == 3
+    assert pool.add([FAST, '10.0.0.1:8080', {'http': FAST}, None, '']) == 0
+
+def test_faster_proxies_are_picked_more(cv, pool):
+    random.seed(7)
+    picks=[pool.choose() for i in range(3000)]
+    assert set(picks) == {FAST, SLOW, DOWN}
+    assert picks.count(FAST) > 5 * picks.count(SLOW)
+
+    # successful, fast downloads raise the score of a proxy
+    for i in range(20):
+        pool.report(SLOW, True, latency=0.1, bps=1024*1024)
+    picks=[pool.choose() for i in range(3000)]
+    assert picks.count(SLOW) > picks.count(FAST)
+
+def test_failing_proxies_are_quarantined(cv, pool):
+    for i in range(cv.PROXY_MAX_FAILURES - 1):
+        pool.report(DOWN, False)
+    assert pool.is_healthy(DOWN)
+    # a success resets the consecutive failures
+    pool.report(DOWN, True)
+    for i in range(cv.PROXY_MAX_FAILURES - 1):
+        pool.report(DOWN, False)
+    assert pool.is_healthy(DOWN)
+    pool.report(DOWN, False)
+    assert not pool.is_healthy(DOWN)
+    assert DOWN not in set(pool.choose() for i in range(500))
+
+    # the cooldown doubles with every quarantine, up to 8 times
+    until=[]
+    for i in range(5):
+        pool.quarantine(DOWN)
+        until.append(pool.proxies[DOWN]['until'] - time.time())
+    assert [round(secs / 60) for secs in until] == [2, 4, 8, 8, 8]
+
+def test_quarantined_proxy_comes_back(cv):
+    pool=cv.ProxyPool([FAST, SLOW], cooldown=0.2, min_proxies=0)
+    pool.quarantine(FAST)
+    pool.quarantine(SLOW)
+    pool.quarantine(SLOW)
+    # none is healthy, the one leaving quarantine first is used
+    assert pool.choose() == FAST
+    time.sleep(0.25)
+    assert pool.is_healthy(FAST) and not pool.is_healthy(SLOW)
+    pool.report(FAST, True)
+    assert pool.proxies[FAST]['strikes'] == 0
+
+class FakeProxyList:
+    found=['10.0.0.4:3128', '10.0.0.5:3128', '10.0.0.6:3128']
+
+    def get(self, limit=5):
+        return list(self.found[:limit])
+
+@pytest.fixture
+def harvester(cv, options, monkeypatch, tmp_path):
+    health={'10.0.0.4:3128': 0.3, '10.0.0.5:3128': 0.1, '10.0.0.6:3128': None}
+    monkeypatch.setattr(cv, 'ProxyList', FakeProxyList)
+    monkeypatch.setattr(cv, 'validate_proxy', lambda proxy: health.get(proxy))
+    monkeypatch.setattr(cv, 'killThreads', False)
+    # one harvest round per run, the sleep between rounds stops the daemon
+    def sleep(secs):
+        cv.killThreads=True
+    monkeypatch.setattr(cv.time, 'sleep', sleep)
+    args=options('--proxy-daemon', '--proxy-store', os.path.join(str(tmp_path), 'proxies.db'), '--proxy-interval', '1')
+    def harvest():
+        cv.killThreads=False
+        cv.run_proxy_daemon(args)
+        return cv.ProxyStore(args.proxy_store)
+    harvest.health=health
+    return harvest
+
+def test_proxy_daemon_persists_validated_proxies(cv, harvester):
+    store=harvester()
+    assert store.load() == [('10.0.0.5:3128', 0.1), ('10.0.0.4:3128', 0.3)]
+    assert sorted(store.proxies()) == ['10.0.0.4:3128', '10.0.0.5:3128']
+
+    # stored proxies are revalidated every round, dropped after PROXY_MAX_FAILURES failed rounds
+    harvester.health['10.0.0.4:3128']=None
+    for i in range(cv.PROXY_MAX_FAILURES - 1):
+        store=harvester()
+        assert store.load() == [('10.0.0.5:3128', 0.1)]
+        assert '10.0.0.4:3128' in store.proxies()
+    harvester.health['10.0.0.5:3128']=0.2
+    store=harvester()
+    assert store.load() == [('10.0.0.5:3128', 0.2)]
+    assert store.proxies() == ['10.0.0.5:3128']
+
+def test_proxy_store_skips_stale_proxies(cv, tmp_path):
+    store=cv.ProxyStore(os.path.join(str(tmp_path), 'store', 'proxies.db'))
+    store.save('10.0.0.7:3128', 0.5)
+    store.save('10.0.0.8:3128', 0.2)
+    with sqlite3.connect(store.path) as db:
+        db.execute("UPDATE proxies SET validated=? WHERE proxy='10.0.0.7:3128'", (time.time() - cv.PROXY_STORE_MAX_AGE - 1,))
+    assert store.load() == [('10.0.0.8:3128', 0.2)]
+    # a failed proxy is left out until it validates again
+    store.fail('10.0.0.8:3128')
+    assert store.load() == []
+    store.save('10.0.0.8:3128', 0.4)
+    assert store.load() == [('10.0.0.8:3128', 0.4)]
+
+def test_pool_refills_from_the_store(cv, harvester):
+    store=harvester()
+    pool=cv.ProxyPool(store=store, min_proxies=2)
+    assert pool.choose() is None
+    pool.refill(wait=True)
+    assert sorted(pool.proxies) == ['http://10.0.0.4:3128', 'http://10.0.0.5:3128']
+    assert pool.proxies['http://10.0.0.5:3128']['latency'] == 0.1
+    assert pool.choose() in pool.proxies
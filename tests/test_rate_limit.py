@@ -0,0 +1,76 @@
+#
+# the adaptive token bucket of the download path on a fake clock, the backoff jitter
+# is pinned to its upper bound
+#
+import pytest
+
+URL='https://ceoaperolls.ap.gov.in/AP_Eroll/Popuppage.aspx'
+
+class Clock:
+    def __init__(self):
+        self.now=1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def limiter(cv, monkeypatch):
+    monkeypatch.setattr(cv, 'uniform', lambda a, b: b)
+    clock=Clock()
+    limiter=cv.RateLimiter(rate=2.0, max_rate=4.0, burst=2, increase=0.5, clock=clock)
+    return limiter
+
+def test_tokens_refill_with_time(limiter):
+    clock=limiter.clock
+    assert [limiter.reserve(URL) for i in range(3)] == [0, 0, 0.5]
+    assert limiter.reserve(URL) == 1.0
+    clock.now+=1.0
+    # 2 tokens back after a second at 2/sec, the two reserved ahead are paid first
+    assert limiter.reserve(URL) == 0.5
+    clock.now+=10
+    # never more than the burst
+    assert [limiter.reserve(URL) for i in range(3)] == [0, 0, 0.5]
+
+def test_buckets_are_per_host_and_proxy(limiter):
+    assert [limiter.reserve(URL) for i in range(3)] == [0, 0, 0.5]
+    assert [limiter.reserve(URL, 'http://10.0.0.1:8080') for i in range(3)] == [0, 0, 0.5]
+    assert limiter.reserve('https://example.com/') == 0
+
+def test_rate_adapts_to_responses(limiter):
+    assert limiter.record(URL, status=200) is False
+    assert limiter.record(URL, status=200) is False
+    assert limiter.buckets[('ceoaperolls.ap.gov.in', '')]['rate'] == 3.0
+    assert limiter.record(URL, status=200) is False
+    assert limiter.record(URL, status=200) is False
+    assert limiter.buckets[('ceoaperolls.ap.gov.in', '')]['rate'] == 4.0
+    assert limiter.record(URL, error=True) is True
+    assert limiter.buckets[('ceoaperolls.ap.gov.in', '')]['rate'] == 3.0
+    assert limiter.record(URL, status=502) is True
+    assert limiter.buckets[('ceoaperolls.ap.gov.in', '')]['rate'] == 2.25
+
+def test_throttled_responses_back_off(limiter):
+    clock=limiter.clock
+    assert limiter.reserve(URL) == 0
+    assert limiter.record(URL, status=429) is True
+    bucket=limiter.buckets[('ceoaperolls.ap.gov.in', '')]
+    assert bucket['rate'] == 1.0
+    # paused for backoff(0), 2 secs, then a token at the halved rate
+    assert limiter.reserve(URL) == 3.0
+
+    clock.now+=3.0
+    assert limiter.record(URL, status=503) is True
+    # the second throttle in a row doubles the pause to 4 secs, then a token at 0.5/sec
+    assert bucket['rate'] == 0.5
+    assert limiter.reserve(URL) == 6.0
+
+    clock.now+=6.0
+    assert limiter.record(URL, status=200) is False
+    assert (bucket['failures'], bucket['rate']) == (0, 1.0)
+    assert limiter.reserve(URL) == 0
+
+def test_backoff_is_capped(cv, monkeypatch):
+    limiter=cv.RateLimiter(backoff_base=2, backoff_cap=60)
+    monkeypatch.setattr(cv, 'uniform', lambda a, b: b)
+    assert [limiter.backoff(attempt) for attempt in range(7)] == [2, 4, 8, 16, 32, 60, 60]
+    monkeypatch.setattr(cv, 'uniform', lambda a, b: a)
+    assert [limiter.backoff(attempt) for attempt in range(3)] == [1, 2, 4]
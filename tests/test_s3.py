@@ -0,0 +1,87 @@
+#
+# --s3-export to a file:// store (FileStore), the voters table is sqlite behind the
+# mysql stand-in of conftest.py and the parts are shrunk to 4 KB
+#
+import csv
+import gzip
+import io
+import os
+import random
+import threading
+
+import pytest
+
+def voters(district, count=3000):
+    rnd=random.Random(district)
+    return [(sno % 900 + 1, 'APO%07d' % rnd.randint(0, 9999999), 'NAME %d' % rnd.randint(0, 99999), 'FS NAME %d' % rnd.randint(0, 99999),
+             '%d-%d' % (rnd.randint(1, 20), rnd.randint(1, 300)), rnd.randint(18, 90), rnd.choice(['Male', 'Female']), 'Ward %d' % rnd.randint(1, 30),
+             district, district * 13, sno // 900 + 1) for sno in range(count)]
+
+@pytest.fixture
+def export(cv, options, mysql_db, monkeypatch, tmp_path):
+    db=mysql_db()
+    db.executemany("INSERT INTO voters VALUES (" + ",".join(["?"] * len(cv.VotersBulkLoader.COLUMNS)) + ")", voters(1) + voters(2))
+    db.commit()
+    monkeypatch.setattr(cv, 'S3_MIN_PART_SIZE', 4096)
+    monkeypatch.setattr(cv, 'S3_STORE', cv.FileStore(os.path.join(str(tmp_path), 'bucket')))
+    monkeypatch.setattr(cv, 'run_value_query', lambda query: [(1,), (2,)])
+    # the failed part is not retried with a delay
+    monkeypatch.setattr(cv.time, 'sleep', lambda secs: None)
+
+    uploads=[]
+    lock=threading.Lock()
+    upload_part=cv.FileStore.upload_part
+    def counted_upload_part(store, key, upload_id, number, data):
+        etag=upload_part(store, key, upload_id, number, data)
+        with lock:
+            uploads.append((key, number))
+        return etag
+    monkeypatch.setattr(cv.FileStore, 'upload_part', counted_upload_part)
+
+    def export(*argv):
+        args=options('--s3', 'file://' + os.path.join(str(tmp_path), 'bucket'), '--s3-export', '--s3-part-size', '0', '--s3-streams', '1', *argv)
+        cv.export_to_s3(args)
+    export.uploads=uploads
+    export.folder=os.path.join(str(tmp_path), 'bucket')
+    return export
+
+def read_export(folder, district):
+    with gzip.open(os.path.join(folder, 'dc_%d.csv.gz' % district), 'rt', newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+def expected_rows(cv, district):
+    rows=sorted(voters(district), key=lambda row: (row[9], row[10], row[0]))
+    out=io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows([cv.VotersBulkLoader.COLUMNS] + rows)
+    return list(csv.reader(io.StringIO(out.getvalue())))
+
+def test_s3_export(cv, export):
+    export()
+    for district in (1, 2):
+        assert read_export(export.folder, district) == expected_rows(cv, district)
+    assert not os.path.exists(os.path.join(export.folder, '.uploads'))
+    assert len(export.uploads) == len(set(export.uploads)) > 10
+
+def test_s3_export_resumes_an_interrupted_upload(cv, export, monkeypatch):
+    upload_part=cv.FileStore.upload_part
+    def failing_upload_part(store, key, upload_id, number, data):
+        if key == 'dc_1.csv.gz' and number == 6:
+            raise IOError("connection reset")
+        return upload_part(store, key, upload_id, number, data)
+    monkeypatch.setattr(cv.FileStore, 'upload_part', failing_upload_part)
+    export()
+    # district 1 is left open on the store with the parts uploaded so far, district 2 is complete
+    assert not os.path.exists(os.path.join(export.folder, 'dc_1.csv.gz'))
+    assert read_export(export.folder, 2) == expected_rows(cv, 2)
+    uploaded=sorted(number for key, number in export.uploads if key == 'dc_1.csv.gz')
+    assert uploaded[:5] == [1, 2, 3, 4, 5] and 6 not in uploaded
+
+    monkeypatch.setattr(cv.FileStore, 'upload_part', upload_part)
+    export('--district', '1')
+    assert read_export(export.folder, 1) == expected_rows(cv, 1)
+    assert not os.path.exists(os.path.join(export.folder, '.uploads'))
+    # every part went up once, the resumed export skipped the parts already on the store
+    parts=[number for key, number in export.uploads if key == 'dc_1.csv.gz']
+    assert sorted(parts) == list(range(1, max(parts) + 1))
+    parts=[number for key, number in export.uploads if key == 'dc_2.csv.gz']
+    assert sorted(parts) == list(range(1, max(parts) + 1))
@@ -0,0 +1,75 @@
+#
+# booth PDF integrity (verify_pdf, --verify) on tests/data/1_2_1.pdf, a minimal one page
+# PDF, and tests/data/error_page.pdf, the site's error page saved as a PDF
+#
+import os
+import shutil
+
+import pytest
+
+from conftest import DATA
+
+PDF_FILE=os.path.join(DATA, '1_2_1.pdf')
+ERROR_PAGE=os.path.join(DATA, 'error_page.pdf')
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def pdf_data():
+    with open(PDF_FILE, 'rb') as f:
+        return f.read()
+
+def test_valid_pdf(cv):
+    assert cv.verify_pdf(PDF_FILE) is None
+    assert cv.verify_pdf(PDF_FILE, len(pdf_data())) is None
+
+def test_length_mismatch(cv):
+    size=len(pdf_data())
+    assert cv.verify_pdf(PDF_FILE, size + 100) == "truncated, %d of %d bytes" % (size, size + 100)
+    assert cv.verify_pdf(PDF_FILE, size - 1) == "truncated, %d of %d bytes" % (size, size - 1)
+
+@pytest.mark.parametrize('data, reason', [
+    (lambda pdf: pdf[:len(pdf) // 2], "missing PDF trailer"),
+    (lambda pdf: pdf[:-8], "missing PDF trailer"),
+    (lambda pdf: b'', "missing PDF header"),
+    (lambda pdf: b'\x00' * 64 + pdf, "missing PDF header"),
+    (lambda pdf: b'%PDF-1.4\n%%EOF\n', "no pages"),
+])
+def test_corrupt_pdfs(cv, tmp_path, data, reason):
+    assert cv.verify_pdf(write(os.path.join(str(tmp_path), 'booth.pdf'), data(pdf_data()))) == reason
+
+def test_html_saved_as_pdf(cv):
+    assert cv.verify_pdf(ERROR_PAGE) == "HTML page instead of PDF"
+
+def test_missing_file(cv, tmp_path):
+    assert "No such file" in cv.verify_pdf(os.path.join(str(tmp_path), 'missing.pdf'))
+
+def test_expected_length(cv):
+    assert cv.expected_length({'Content-Length': '1234'}) == 1234
+    assert cv.expected_length({'Content-Length': '1234', 'Content-Encoding': 'gzip'}) is None
+    assert cv.expected_length({'Content-Length': 'abc'}) is None
+    assert cv.expected_length({}) is None
+
+def test_verify_output_tree(cv, options, tmp_path):
+    folder=os.path.join(str(tmp_path), '1_2')
+    os.makedirs(folder)
+    shutil.copy(PDF_FILE, os.path.join(folder, '1_2_1.pdf'))
+    write(os.path.join(folder, '1_2_2.pdf'), pdf_data()[:100])
+    shutil.copy(ERROR_PAGE, os.path.join(folder, '1_2_3.pdf'))
+    shutil.copy(PDF_FILE, os.path.join(folder, '1_2_4.pdf'))
+    write(os.path.join(folder, '1_2_5.pdf.part'), pdf_data()[:100])
+    journal=cv.get_booth_journal(str(tmp_path), 1, 2)
+    journal.mark(4, cv.BOOTH_DOWNLOADED, bytes=len(pdf_data()), sha256='known')
+
+    args=options('--verify', '--output', str(tmp_path))
+    assert cv.verify_output_tree(args) == {(1, 2): [2, 3]}
+    assert sorted(os.listdir(folder)) == ['1_2_1.pdf', '1_2_4.pdf', '1_2_journal.jsonl']
+    # valid files missing from the journal are added, the corrupt ones requeued
+    assert journal.get(1)['verified'] and journal.get(1)['bytes'] == len(pdf_data())
+    assert journal.get(4)['sha256'] == 'known'
+    assert [journal.state(booth) for booth in (2, 3)] == [cv.BOOTH_FAILED] * 2
+    assert journal.get(2)['reason'] == "corrupt: missing PDF trailer"
+    assert journal.get(3)['reason'] == "corrupt: HTML page instead of PDF"
+    assert journal.failed_booths() == [2, 3]